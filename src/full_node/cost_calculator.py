@@ -1,4 +1,4 @@
-from typing import Tuple, Optional, List
+from typing import Dict, Tuple, Optional, List
 
 from src.consensus.condition_costs import ConditionCost
 from src.types.condition_opcodes import ConditionOpcode
@@ -8,6 +8,19 @@ from src.util.errors import Err
 from src.util.ints import uint64
 from src.full_node.mempool_check_conditions import get_name_puzzle_conditions
 
+# Cost of each condition. Conditions that are not here are free, we ignore unknown conditions in order
+# to allow for future soft forks.
+CONDITION_COSTS: Dict[ConditionOpcode, int] = {
+    ConditionOpcode.AGG_SIG: ConditionCost.AGG_SIG.value,
+    ConditionOpcode.CREATE_COIN: ConditionCost.CREATE_COIN.value,
+    ConditionOpcode.ASSERT_TIME_EXCEEDS: ConditionCost.ASSERT_TIME_EXCEEDS.value,
+    ConditionOpcode.ASSERT_BLOCK_AGE_EXCEEDS: ConditionCost.ASSERT_BLOCK_AGE_EXCEEDS.value,
+    ConditionOpcode.ASSERT_BLOCK_INDEX_EXCEEDS: ConditionCost.ASSERT_BLOCK_INDEX_EXCEEDS.value,
+    ConditionOpcode.ASSERT_MY_COIN_ID: ConditionCost.ASSERT_MY_COIN_ID.value,
+    ConditionOpcode.ASSERT_COIN_CONSUMED: ConditionCost.ASSERT_COIN_CONSUMED.value,
+    ConditionOpcode.ASSERT_FEE: ConditionCost.ASSERT_FEE.value,
+}
+
 
 def calculate_cost_of_program(
     program: Program,
@@ -27,38 +40,10 @@ def calculate_cost_of_program(
     total_vbyte_cost = 0
     for npc in npc_list:
         for condition, cvp_list in npc.condition_dict.items():
-            if condition is ConditionOpcode.AGG_SIG:
-                total_vbyte_cost += len(cvp_list) * ConditionCost.AGG_SIG.value
-            elif condition is ConditionOpcode.CREATE_COIN:
-                total_vbyte_cost += len(cvp_list) * ConditionCost.CREATE_COIN.value
-            elif condition is ConditionOpcode.ASSERT_TIME_EXCEEDS:
-                total_vbyte_cost += (
-                    len(cvp_list) * ConditionCost.ASSERT_TIME_EXCEEDS.value
-                )
-            elif condition is ConditionOpcode.ASSERT_BLOCK_AGE_EXCEEDS:
-                total_vbyte_cost += (
-                    len(cvp_list) * ConditionCost.ASSERT_BLOCK_AGE_EXCEEDS.value
-                )
-            elif condition is ConditionOpcode.ASSERT_BLOCK_INDEX_EXCEEDS:
-                total_vbyte_cost += (
-                    len(cvp_list) * ConditionCost.ASSERT_BLOCK_INDEX_EXCEEDS.value
-                )
-            elif condition is ConditionOpcode.ASSERT_MY_COIN_ID:
-                total_vbyte_cost += (
-                    len(cvp_list) * ConditionCost.ASSERT_MY_COIN_ID.value
-                )
-            elif condition is ConditionOpcode.ASSERT_COIN_CONSUMED:
-                total_vbyte_cost += (
-                    len(cvp_list) * ConditionCost.ASSERT_COIN_CONSUMED.value
-                )
-            elif condition is ConditionOpcode.ASSERT_FEE:
-                total_vbyte_cost += len(cvp_list) * ConditionCost.ASSERT_FEE.value
-            else:
-                # We ignore unknown conditions in order to allow for future soft forks
-                pass
+            total_vbyte_cost += len(cvp_list) * CONDITION_COSTS.get(condition, 0)
 
     # Add raw size of the program
-    total_vbyte_cost += len(bytes(program))
+    total_vbyte_cost += program.size_bytes
 
     total_clvm_cost += total_vbyte_cost * clvm_cost_ratio_constant
 
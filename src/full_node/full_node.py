@@ -1980,6 +1980,55 @@ class FullNode:
             Delivery.RESPOND,
         )
 
+    @api_request
+    async def request_headers(
+        self, request: wallet_protocol.RequestHeaders
+    ) -> OutboundMessageGenerator:
+        """
+        Batched version of request_header, for a contiguous range of heights. Responds with one
+        RespondHeader (or RejectHeaderRequest) per height, so the wallet only pays one round trip.
+        Ranges longer than max_headers_per_request are ignored.
+        """
+        if (
+            request.end_height < request.start_height
+            or len(request.header_hashes)
+            != request.end_height - request.start_height + 1
+            or len(request.header_hashes) > wallet_protocol.max_headers_per_request
+        ):
+            self.log.warning(f"Invalid range in headers request {request.start_height}")
+            return
+        for index, header_hash in enumerate(request.header_hashes):
+            async for msg in self.request_header(
+                wallet_protocol.RequestHeader(
+                    uint32(request.start_height + index), header_hash
+                )
+            ):
+                yield msg
+
+    @api_request
+    async def request_header_ancestors(
+        self, request: wallet_protocol.RequestHeaderAncestors
+    ) -> OutboundMessageGenerator:
+        """
+        Responds with the requested header and up to count - 1 of its ancestors, oldest first, so a
+        wallet that is missing a short chain of blocks can fetch all of them in one round trip. The
+        count is capped at max_header_ancestors, so a single request cannot make us send the chain.
+        """
+        count = min(
+            request.count, wallet_protocol.max_header_ancestors, request.height + 1
+        )
+        header_hashes: List[bytes32] = [request.header_hash]
+        header: Optional[Header] = self.blockchain.headers.get(request.header_hash)
+        while header is not None and header.height > 0 and len(header_hashes) < count:
+            header_hashes.append(header.prev_header_hash)
+            header = self.blockchain.headers.get(header.prev_header_hash)
+        start_height = request.height - len(header_hashes) + 1
+        for index, header_hash in enumerate(reversed(header_hashes)):
+            async for msg in self.request_header(
+                wallet_protocol.RequestHeader(uint32(start_height + index), header_hash)
+            ):
+                yield msg
+
     @api_request
     async def request_removals(
         self, request: wallet_protocol.RequestRemovals
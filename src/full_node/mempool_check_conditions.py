@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from typing import Optional, List, Dict, Tuple
 
 from src.types.condition_var_pair import ConditionVarPair
@@ -14,6 +15,16 @@ import time
 
 from src.util.ints import uint64
 
+# Results of get_name_puzzle_conditions by hash of the serialized program, least recently used first, with the
+# approximate size of each result. The same program is evaluated several times (cost calculation, block
+# validation, additions and removals of a block), and evaluating it is deterministic. The cache is bounded by
+# the total size of the results, not by their number, since a single block can have many spends.
+NPC_CACHE_MAX_BYTES = 4 * 1024 * 1024
+_npc_cache: "OrderedDict[bytes32, Tuple[int, Tuple[Optional[Err], List[NPC], uint64]]]" = (
+    OrderedDict()
+)
+_npc_cache_bytes = 0
+
 
 def mempool_assert_coin_consumed(
     condition: ConditionVarPair, spend_bundle: SpendBundle, mempool: Mempool
@@ -94,6 +105,42 @@ def get_name_puzzle_conditions(
     Returns an error if it's unable to evaluate, otherwise
     returns a list of NPC (coin_name, solved_puzzle_hash, conditions_dict)
     """
+    global _npc_cache_bytes
+
+    key = block_program.serialized_hash
+    cached = _npc_cache.get(key)
+    if cached is None:
+        result = _evaluate_name_puzzle_conditions(block_program)
+        size = _npc_result_size(result[1])
+        if size <= NPC_CACHE_MAX_BYTES:
+            _npc_cache[key] = (size, result)
+            _npc_cache_bytes += size
+            while _npc_cache_bytes > NPC_CACHE_MAX_BYTES:
+                _, (evicted_size, _) = _npc_cache.popitem(last=False)
+                _npc_cache_bytes -= evicted_size
+    else:
+        _npc_cache.move_to_end(key)
+        result = cached[1]
+    error, npc_list, cost = result
+    return error, list(npc_list), cost
+
+
+def _npc_result_size(npc_list: List[NPC]) -> int:
+    """
+    Approximate size of an evaluation result in bytes, counting the hashes and condition arguments
+    """
+    size = 0
+    for npc in npc_list:
+        size += 64
+        for cvp_list in npc.condition_dict.values():
+            for cvp in cvp_list:
+                size += 32 + len(cvp.var1 or b"") + len(cvp.var2 or b"")
+    return size
+
+
+def _evaluate_name_puzzle_conditions(
+    block_program: Program,
+) -> Tuple[Optional[Err], List[NPC], uint64]:
     cost_sum = 0
     try:
         cost_run, sexp = block_program.run_with_cost([])
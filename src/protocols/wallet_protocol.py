@@ -15,6 +15,11 @@ from src.util.streamable import Streamable, streamable
 Protocol between wallet (SPV node) and full node.
 """
 
+# Maximum number of headers that can be requested with a single RequestHeaders
+max_headers_per_request = 128
+# Maximum number of headers a full node sends for a single RequestHeaderAncestors
+max_header_ancestors = 32
+
 
 @dataclass(frozen=True)
 @streamable
@@ -87,6 +92,24 @@ class RequestHeader:
     header_hash: bytes32
 
 
+@dataclass(frozen=True)
+@cbor_message
+class RequestHeaders:
+    # Inclusive range of heights, header_hashes[i] is the hash at start_height + i
+    start_height: uint32
+    end_height: uint32
+    header_hashes: List[bytes32]
+
+
+@dataclass(frozen=True)
+@cbor_message
+class RequestHeaderAncestors:
+    # The header at height, preceded by up to count - 1 of its ancestors
+    height: uint32
+    header_hash: bytes32
+    count: uint32
+
+
 @dataclass(frozen=True)
 @cbor_message
 class RespondHeader:
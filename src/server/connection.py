@@ -79,7 +79,7 @@ class ChiaConnection:
         return self.writer.is_closing()
 
     async def send(self, message: Message):
-        encoded: bytes = cbor.dumps({"f": message.function, "d": message.data})
+        encoded: bytes = cbor.dumps_message(message.function, message.data)
         assert len(encoded) < (2 ** (LENGTH_BYTES * 8))
         self.writer.write(len(encoded).to_bytes(LENGTH_BYTES, "big") + encoded)
         try:
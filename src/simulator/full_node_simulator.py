@@ -72,6 +72,20 @@ class FullNodeSimulator(FullNode):
         async for msg in super().request_header(request):
             yield msg
 
+    @api_request
+    async def request_headers(
+        self, request: wallet_protocol.RequestHeaders
+    ) -> OutboundMessageGenerator:
+        async for msg in super().request_headers(request):
+            yield msg
+
+    @api_request
+    async def request_header_ancestors(
+        self, request: wallet_protocol.RequestHeaderAncestors
+    ) -> OutboundMessageGenerator:
+        async for msg in super().request_header_ancestors(request):
+            yield msg
+
     @api_request
     async def request_removals(
         self, request: wallet_protocol.RequestRemovals
@@ -46,10 +46,10 @@ class Coin(Streamable):
 
 
 def hash_coin_list(coin_list: List[Coin]) -> bytes32:
-    coin_list.sort(key=lambda x: x.name_str, reverse=True)
-    buffer = bytearray()
+    # Hash each coin once; ordering by the raw name is the same as by its hex
+    named_coins = sorted(
+        [(coin.name(), coin) for coin in coin_list], key=lambda x: x[0], reverse=True
+    )
+    coin_list[:] = [coin for _, coin in named_coins]
 
-    for coin in coin_list:
-        buffer.extend(coin.name())
-
-    return std_hash(buffer)
+    return std_hash(b"".join(name for name, _ in named_coins))
@@ -62,6 +62,30 @@ class Program(SExp):
     def __str__(self) -> str:
         return bytes(self).hex()
 
+    @property
+    def size_bytes(self) -> int:
+        """
+        Length of the serialized program. It's computed once, since serializing walks the whole tree.
+        """
+        size: Optional[int] = getattr(self, "_size_bytes", None)
+        if size is None:
+            size = len(bytes(self))
+            self._size_bytes = size
+        return size
+
+    @property
+    def serialized_hash(self) -> bytes32:
+        """
+        Hash of the serialized program. It's computed once, and also sets size_bytes from the same serialization.
+        """
+        serialized_hash: Optional[bytes32] = getattr(self, "_serialized_hash", None)
+        if serialized_hash is None:
+            blob = bytes(self)
+            self._size_bytes = len(blob)
+            serialized_hash = std_hash(blob)
+            self._serialized_hash = serialized_hash
+        return serialized_hash
+
     def _tree_hash(self, precalculated: Set[bytes32]) -> bytes32:
         """
         Hash values in `precalculated` are presumed to have been hashed already.
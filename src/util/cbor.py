@@ -1,7 +1,9 @@
-from typing import Any, Dict, get_type_hints
+from typing import Any, Dict
 
 import cbor2
 
+from src.util.type_checking import get_cached_type_hints
+
 
 """
 Encode CBOR objects (python objects with @cbor_message decorator), as dictionaries.
@@ -17,7 +19,7 @@ def default_encoder(encoder, value: Any):
     on each property.
     """
     if hasattr(type(value), "__cbor_message__"):
-        fields: Dict = get_type_hints(value)
+        fields: Dict = get_cached_type_hints(value)
         els = {f_name: getattr(value, f_name) for f_name in fields.keys()}
         encoder.encode(els)
     elif hasattr(type(value), "__bytes__"):
@@ -30,5 +32,22 @@ def dumps(data: Any) -> bytes:
     return cbor2.dumps(data, default=default_encoder)
 
 
+# Encoded start of the {"f": function, "d": data} map of each message function, see dumps_message
+_message_prefixes: Dict[str, bytes] = {}
+
+
+def dumps_message(function: str, data: Any) -> bytes:
+    """
+    Encodes a message the same as dumps({"f": function, "d": data}), but the map header and function
+    name are only encoded once per function.
+    """
+    prefix = _message_prefixes.get(function)
+    if prefix is None:
+        # A map of two items, followed by its "f" key and value, and the "d" key
+        prefix = b"\xa2" + dumps("f") + dumps(function) + dumps("d")
+        _message_prefixes[function] = prefix
+    return prefix + dumps(data)
+
+
 def loads(data: bytes) -> Any:
     return cbor2.loads(data)
@@ -215,6 +215,29 @@ class Keychain:
             pkent = self._get_pk_and_entropy(self._get_private_key_user(index))
         return None
 
+    def get_private_key_by_fingerprint(
+        self, fingerprint: int, passphrases: List[str] = [""]
+    ) -> Optional[Tuple[PrivateKey, bytes]]:
+        """
+        Returns the first private key which has the given public key fingerprint. Only the private key
+        with a matching (stored) public key is derived.
+        """
+        index = 0
+        pkent = self._get_pk_and_entropy(self._get_private_key_user(index))
+        while index <= MAX_KEYS:
+            if pkent is not None:
+                pk, ent = pkent
+                if pk.get_fingerprint() == fingerprint:
+                    for pp in passphrases:
+                        mnemonic = bytes_to_mnemonic(ent)
+                        seed = mnemonic_to_seed(mnemonic, pp)
+                        key = AugSchemeMPL.key_gen(seed)
+                        if key.get_g1() == pk:
+                            return (key, ent)
+            index += 1
+            pkent = self._get_pk_and_entropy(self._get_private_key_user(index))
+        return None
+
     def get_all_private_keys(
         self, passphrases: List[str] = [""]
     ) -> List[Tuple[PrivateKey, bytes]]:
@@ -1,5 +1,5 @@
 from hashlib import sha256
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 """
 A simple, confidence-inspiring Merkle Set standard
@@ -30,6 +30,12 @@ EMPTY: \x00
 TERMINAL: \x01
 MIDDLE: \x02
 TRUNCATED: \x03
+
+Performance note: every node hash goes through hashlib's sha256, which is
+OpenSSL's implementation. Verifying proofs during wallet sync is bound by it,
+so run on an interpreter linked against OpenSSL >= 1.1.1 (check
+ssl.OPENSSL_VERSION), which uses the SHA extensions (SHA-NI) where the CPU has
+them.
 """
 
 EMPTY = bytes([0])
@@ -39,23 +45,16 @@ TRUNCATED = bytes([3])
 
 BLANK = bytes([0] * 32)
 
-prehashed: Dict = {}
-
-
-def init_prehashed():
-    for x in [EMPTY, TERMINAL, MIDDLE]:
-        for y in [EMPTY, TERMINAL, MIDDLE]:
-            prehashed[x + y] = sha256(bytes([0] * 30) + x + y)
-
-
-init_prehashed()
+HASH_PREFIX = bytes([0] * 30)
 
 
 def hashdown(mystr):
     assert len(mystr) == 66
-    h = prehashed[bytes(mystr[0:1] + mystr[33:34])].copy()
-    h.update(mystr[1:33] + mystr[34:])
-    return h.digest()[:32]
+    # One sha256 call over the whole 96 byte block is cheaper than copying a
+    # prehashed prefix state and updating it
+    return sha256(
+        HASH_PREFIX + mystr[0:1] + mystr[33:34] + mystr[1:33] + mystr[34:]
+    ).digest()
 
 
 def compress_root(mystr):
@@ -190,7 +189,7 @@ class TerminalNode:
 
 
 class MiddleNode:
-    def __init__(self, children):
+    def __init__(self, children, hash_cache: Optional[Dict[bytes, bytes]] = None):
         self.children = children
         if children[0].is_empty() and children[1].is_double():
             self.hash = children[1].hash
@@ -209,7 +208,16 @@ class MiddleNode:
                 and children[0].hash >= children[1].hash
             ):
                 raise SetError
-            self.hash = hashdown(children[0].get_hash() + children[1].get_hash())
+            to_hash = children[0].get_hash() + children[1].get_hash()
+            if hash_cache is None:
+                self.hash = hashdown(to_hash)
+            else:
+                # Proofs against the same root share the internal nodes close to it
+                cached_hash = hash_cache.get(to_hash)
+                if cached_hash is None:
+                    cached_hash = hashdown(to_hash)
+                    hash_cache[to_hash] = cached_hash
+                self.hash = cached_hash
 
     def get_hash(self):
         return MIDDLE + self.hash
@@ -320,9 +328,21 @@ def confirm_not_included_already_hashed(root, val, proof):
     return _confirm(root, val, proof, False)
 
 
-def _confirm(root, val, proof, expected):
+def confirm_all_already_hashed(root, proofs: List[Tuple[bytes, bytes, bool]]) -> bool:
+    """
+    Confirms a batch of (val, proof, included) proofs of inclusion or exclusion against the
+    same root. Internal node hashes which are shared between the proofs are computed once.
+    """
+    hash_cache: Dict[bytes, bytes] = {}
+    for val, proof, expected in proofs:
+        if not _confirm(root, val, proof, expected, hash_cache):
+            return False
+    return True
+
+
+def _confirm(root, val, proof, expected, hash_cache=None):
     try:
-        p = deserialize_proof(proof)
+        p = deserialize_proof(proof, hash_cache)
         if p.get_root() != root:
             return False
         r, junk = p.is_included_already_hashed(val)
@@ -331,9 +351,9 @@ def _confirm(root, val, proof, expected):
         return False
 
 
-def deserialize_proof(proof):
+def deserialize_proof(proof, hash_cache=None):
     try:
-        r, pos = _deserialize(proof, 0, [])
+        r, pos = _deserialize(proof, 0, [], hash_cache)
         if pos != len(proof):
             raise SetError()
         return MerkleSet(r)
@@ -341,7 +361,7 @@ def deserialize_proof(proof):
         raise SetError()
 
 
-def _deserialize(proof, pos, bits):
+def _deserialize(proof, pos, bits, hash_cache=None):
     t = proof[pos : pos + 1]  # flake8: noqa
     if t == EMPTY:
         return _empty, pos + 1
@@ -351,6 +371,6 @@ def _deserialize(proof, pos, bits):
         return TruncatedNode(proof[pos + 1 : pos + 33]), pos + 33  # flake8: noqa
     if t != MIDDLE:
         raise SetError()
-    v0, pos = _deserialize(proof, pos + 1, bits + [0])
-    v1, pos = _deserialize(proof, pos, bits + [1])
-    return MiddleNode([v0, v1]), pos
+    v0, pos = _deserialize(proof, pos + 1, bits + [0], hash_cache)
+    v1, pos = _deserialize(proof, pos, bits + [1], hash_cache)
+    return MiddleNode([v0, v1], hash_cache), pos
@@ -1,5 +1,21 @@
 import dataclasses
-from typing import Any, List, Type, Union, get_type_hints
+from typing import Any, Dict, List, Tuple, Type, Union, get_type_hints
+
+# Type hints by (class, whether they were requested for the class itself or for an instance of it)
+_type_hints: Dict[Tuple[Type, bool], Dict[str, Type]] = {}
+
+
+def get_cached_type_hints(obj: Any) -> Dict[str, Type]:
+    """
+    Returns get_type_hints(obj) for a class or an instance, cached by class. Evaluating the hints is slow,
+    and it's done every time a message or streamable is created, serialized or parsed.
+    """
+    key = (obj, True) if isinstance(obj, type) else (type(obj), False)
+    hints = _type_hints.get(key)
+    if hints is None:
+        hints = get_type_hints(obj)
+        _type_hints[key] = hints
+    return hints
 
 
 def is_type_List(f_type: Type) -> bool:
@@ -76,7 +92,7 @@ def strictdataclass(cls: Any):
             return item
 
         def __post_init__(self):
-            fields = get_type_hints(self)
+            fields = get_cached_type_hints(self)
             data = self.__dict__
             for (f_name, f_type) in fields.items():
                 if f_name not in data:
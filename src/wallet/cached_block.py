@@ -0,0 +1,31 @@
+from typing import Optional
+
+from src.types.header_block import HeaderBlock
+from src.types.sized_bytes import bytes32
+from src.wallet.block_record import BlockRecord
+
+
+class CachedBlock:
+    """
+    A block that the wallet node has received the header for, but has not finished yet (or that is
+    kept around during sync). The header block is kept serialized, since most cached headers are
+    only needed once, and it is much smaller than the deserialized object. next_header_hash points
+    to a cached child that is waiting for this block to be added.
+    """
+
+    __slots__ = ("record", "header_bytes", "transactions_filter", "next_header_hash")
+
+    def __init__(
+        self,
+        record: BlockRecord,
+        header_bytes: bytes,
+        transactions_filter: bytes,
+        next_header_hash: Optional[bytes32] = None,
+    ):
+        self.record = record
+        self.header_bytes = header_bytes
+        self.transactions_filter = transactions_filter
+        self.next_header_hash = next_header_hash
+
+    def header_block(self) -> HeaderBlock:
+        return HeaderBlock.from_bytes(self.header_bytes)
@@ -274,6 +274,8 @@ class CCWallet:
                 callback="generator_received",
                 done=False,
                 data=data_str,
+                params_height=uint32(height),
+                params_hdrhash=header_hash,
             )
 
     async def search_for_parent_info(
@@ -1,6 +1,9 @@
-from typing import Optional, List
+import json
+from typing import Optional, List, Tuple
 
 import aiosqlite
+from src.types.sized_bytes import bytes32
+from src.util.byte_types import hexstr_to_bytes
 from src.util.ints import uint32
 from src.wallet.util.wallet_types import WalletType
 from src.wallet.wallet_action import WalletAction
@@ -30,9 +33,12 @@ class WalletActionStore:
                 " wallet_type int,"
                 " wallet_callback text,"
                 " done int,"
-                " data text)"
+                " data text,"
+                " params_height int,"
+                " params_hdrhash text)"
             )
         )
+        await self._add_params_columns()
 
         await self.db_connection.execute(
             "CREATE INDEX IF NOT EXISTS name on action_queue(name)"
@@ -49,6 +55,37 @@ class WalletActionStore:
         await self.db_connection.commit()
         return self
 
+    async def _add_params_columns(self):
+        """
+        Adds the params columns to databases created before they existed, filling them in
+        from the JSON data of the stored actions.
+        """
+        cursor = await self.db_connection.execute("PRAGMA table_info(action_queue)")
+        columns = [row[1] for row in await cursor.fetchall()]
+        await cursor.close()
+        if "params_height" in columns:
+            return
+
+        await self.db_connection.execute(
+            "ALTER TABLE action_queue ADD COLUMN params_height int"
+        )
+        await self.db_connection.execute(
+            "ALTER TABLE action_queue ADD COLUMN params_hdrhash text"
+        )
+        cursor = await self.db_connection.execute(
+            "SELECT id, data from action_queue WHERE name=?", ("request_generator",)
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+        for row in rows:
+            action_data = json.loads(row[1])["data"]["action_data"]
+            header_hash = bytes32(hexstr_to_bytes(action_data["header_hash"]))
+            cursor = await self.db_connection.execute(
+                "UPDATE action_queue SET params_height=?, params_hdrhash=? WHERE id=?",
+                (action_data["height"], header_hash.hex(), row[0]),
+            )
+            await cursor.close()
+
     async def _clear_database(self):
         cursor = await self.db_connection.execute("DELETE FROM action_queue")
         await cursor.close()
@@ -80,13 +117,26 @@ class WalletActionStore:
         callback: str,
         done: bool,
         data: str,
+        params_height: Optional[uint32] = None,
+        params_hdrhash: Optional[bytes32] = None,
     ):
         """
-        Creates Wallet Action
+        Creates Wallet Action. The params are the height and header hash the action refers to,
+        they are stored in their own columns so pending actions can be read without parsing data.
         """
         cursor = await self.db_connection.execute(
-            "INSERT INTO action_queue VALUES(?, ?, ?, ?, ?, ?, ?)",
-            (None, name, wallet_id, type, callback, done, data),
+            "INSERT INTO action_queue VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                None,
+                name,
+                wallet_id,
+                type,
+                callback,
+                done,
+                data,
+                params_height,
+                None if params_hdrhash is None else params_hdrhash.hex(),
+            ),
         )
         await cursor.close()
         await self.db_connection.commit()
@@ -99,16 +149,7 @@ class WalletActionStore:
         assert action is not None
 
         cursor = await self.db_connection.execute(
-            "Replace INTO action_queue VALUES(?, ?, ?, ?, ?, ?, ?)",
-            (
-                action.id,
-                action.name,
-                action.wallet_id,
-                action.type.value,
-                action.wallet_callback,
-                True,
-                action.data,
-            ),
+            "UPDATE action_queue SET done=? WHERE id=?", (True, action.id)
         )
 
         await cursor.close()
@@ -136,6 +177,25 @@ class WalletActionStore:
 
         return result
 
+    async def get_pending_action_params(
+        self, name: str
+    ) -> List[Tuple[uint32, bytes32]]:
+        """
+        Returns the (height, header hash) params of all pending actions with the given name
+        """
+        cursor = await self.db_connection.execute(
+            "SELECT params_height, params_hdrhash from action_queue WHERE done=? AND name=?",
+            (0, name),
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+
+        return [
+            (uint32(row[0]), bytes32(bytes.fromhex(row[1])))
+            for row in rows
+            if row[0] is not None and row[1] is not None
+        ]
+
     async def get_action_by_id(self, id) -> Optional[WalletAction]:
         """
         Return a wallet action by id
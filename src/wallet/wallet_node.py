@@ -1,6 +1,7 @@
 import asyncio
-import json
+import heapq
 import time
+from dataclasses import replace
 from typing import Dict, Optional, Tuple, List, AsyncGenerator, Callable
 import concurrent
 from pathlib import Path
@@ -11,12 +12,7 @@ import traceback
 from blspy import PrivateKey
 
 from src.types.peer_info import PeerInfo
-from src.util.byte_types import hexstr_to_bytes
-from src.util.merkle_set import (
-    confirm_included_already_hashed,
-    confirm_not_included_already_hashed,
-    MerkleSet,
-)
+from src.util.merkle_set import confirm_all_already_hashed, MerkleSet
 from src.protocols import introducer_protocol, wallet_protocol, full_node_protocol
 from src.consensus.constants import ConsensusConstants
 from src.server.connection import PeerConnections
@@ -31,9 +27,9 @@ from src.wallet.settings.settings_objects import BackupInitialized
 from src.wallet.transaction_record import TransactionRecord
 from src.wallet.util.backup_utils import open_backup_file
 from src.wallet.util.wallet_types import WalletType
-from src.wallet.wallet_action import WalletAction
 from src.wallet.wallet_state_manager import WalletStateManager
 from src.wallet.block_record import BlockRecord
+from src.wallet.cached_block import CachedBlock
 from src.types.header_block import HeaderBlock
 from src.types.full_block import FullBlock
 from src.types.coin import Coin, hash_coin_list
@@ -58,10 +54,13 @@ class WalletNode:
 
     # Maintains headers recently received. Once the desired removals and additions are downloaded,
     # the data is persisted in the WalletStateManager. These variables are also used to store
-    # temporary sync data. The bytes is the transaction filter.
-    cached_blocks: Dict[bytes32, Tuple[BlockRecord, HeaderBlock, bytes]]
+    # temporary sync data.
+    cached_blocks: Dict[bytes32, CachedBlock]
+    # Min heap of (height, header hash) of the cached blocks, to evict the lowest ones without a scan
+    cached_block_heights: List[Tuple[uint32, bytes32]]
 
-    # Prev hash to curr hash
+    # Prev hash to curr hash, for children that arrive before their parent is cached. Once the parent
+    # is cached, the link is kept in its CachedBlock.next_header_hash instead
     future_block_hashes: Dict[bytes32, bytes32]
 
     # Hashes of the PoT and PoSpace for all blocks (including occasional difficulty adjustments)
@@ -71,14 +70,27 @@ class WalletNode:
     header_hashes: List[bytes32]
     header_hashes_error: bool
 
-    # Event to signal when a block is received (during sync)
-    potential_blocks_received: Dict[uint32, asyncio.Event]
+    # Events to signal when header hashes and proof hashes are received (during sync)
+    header_hashes_received: Optional[asyncio.Event]
+    proof_hashes_received: Optional[asyncio.Event]
+
+    # Bitset of the heights received during sync, and condition to signal when a block is received
+    potential_blocks_received: bytearray
+    potential_blocks_cond: Optional[asyncio.Condition]
     potential_header_hashes: Dict[uint32, bytes32]
 
     # How far away from LCA we must be to perform a full sync. Before then, do a short sync,
     # which is consecutive requests for the previous block
     short_sync_threshold: int
+    # Cached blocks (and potential header hashes) more than this many heights below the LCA are evicted
+    cached_blocks_depth: int
+    # Resolved address of the configured full node peer, and the time it was resolved
+    _resolved_full_node: Optional[Tuple[PeerInfo, float]]
     sync_generator_task: Optional[AsyncGenerator]
+    # Only one resend of pending transactions and actions runs at a time. Requests that arrive while it
+    # runs are coalesced into a single extra pass, instead of each one querying the database again.
+    _resend_task: Optional[asyncio.Task]
+    _resend_requested: bool
     _shut_down: bool
     root_path: Path
     state_changed_callback: Optional[Callable]
@@ -101,6 +113,7 @@ class WalletNode:
 
         # Normal operation data
         self.cached_blocks = {}
+        self.cached_block_heights = []
         self.future_block_hashes = {}
         self.keychain = keychain
 
@@ -109,33 +122,37 @@ class WalletNode:
         self.proof_hashes = []
         self.header_hashes = []
         self.header_hashes_error = False
+        self.header_hashes_received = None
+        self.proof_hashes_received = None
         self.short_sync_threshold = 15  # Change the test when changing this
-        self.potential_blocks_received = {}
+        self.cached_blocks_depth = 256
+        self._resolved_full_node = None
+        self.potential_blocks_received = bytearray()
+        self.potential_blocks_cond = None
         self.potential_header_hashes = {}
         self.state_changed_callback = None
         self.wallet_state_manager = None
         self.backup_initialized = False  # Delay first launch sync after user imports backup info or decides to skip
         self.sync_generator_task = None
+        self._resend_task = None
+        self._resend_requested = False
         self.server = None
         self.wsm_close_task = None
 
     def get_key_for_fingerprint(self, fingerprint):
-        private_keys = self.keychain.get_all_private_keys()
-        if len(private_keys) == 0:
-            self.log.warning(
-                "No keys present. Create keys with the UI, or with the 'chia keys' program."
-            )
-            return None
-
-        private_key: Optional[PrivateKey] = None
+        # Only the requested key is derived, the others are matched by their stored public key
+        key_and_entropy: Optional[Tuple[PrivateKey, bytes]]
         if fingerprint is not None:
-            for sk, _ in private_keys:
-                if sk.get_g1().get_fingerprint() == fingerprint:
-                    private_key = sk
-                    break
+            key_and_entropy = self.keychain.get_private_key_by_fingerprint(fingerprint)
         else:
-            private_key = private_keys[0][0]
-        return private_key
+            key_and_entropy = self.keychain.get_first_private_key()
+        if key_and_entropy is None:
+            if self.keychain.get_first_public_key() is None:
+                self.log.warning(
+                    "No keys present. Create keys with the UI, or with the 'chia keys' program."
+                )
+            return None
+        return key_and_entropy[0]
 
     async def _start(
         self,
@@ -161,6 +178,11 @@ class WalletNode:
         self.wsm_close_task = None
         assert self.wallet_state_manager is not None
 
+        # Blocks cached for a previous wallet state are not processed again, so start without them
+        self.cached_blocks = {}
+        self.cached_block_heights = []
+        self.future_block_hashes = {}
+
         backup_settings: BackupInitialized = (
             self.wallet_state_manager.user_settings.get_backup_settings()
         )
@@ -214,6 +236,11 @@ class WalletNode:
 
     def _close(self):
         self._shut_down = True
+        # Wakes up a sync that is waiting for hashes, so it can exit
+        if self.header_hashes_received is not None:
+            self.header_hashes_received.set()
+        if self.proof_hashes_received is not None:
+            self.proof_hashes_received.set()
         if self.wallet_state_manager is None:
             return
         self.wsm_close_task = asyncio.create_task(
@@ -247,27 +274,33 @@ class WalletNode:
     def _pending_tx_handler(self):
         if self.wallet_state_manager is None or self.backup_initialized is False:
             return
-        asyncio.ensure_future(self._resend_queue())
+        if self._resend_task is not None and not self._resend_task.done():
+            self._resend_requested = True
+            return
+        self._resend_task = asyncio.ensure_future(self._coalesced_resend_queue())
+
+    async def _coalesced_resend_queue(self):
+        while True:
+            self._resend_requested = False
+            await self._resend_queue()
+            if not self._resend_requested:
+                return
 
     async def _action_messages(self) -> List[OutboundMessage]:
         if self.wallet_state_manager is None or self.backup_initialized is False:
             return []
-        actions: List[
-            WalletAction
-        ] = await self.wallet_state_manager.action_store.get_all_pending_actions()
+        params: List[
+            Tuple[uint32, bytes32]
+        ] = await self.wallet_state_manager.action_store.get_pending_action_params(
+            "request_generator"
+        )
         result: List[OutboundMessage] = []
-        for action in actions:
-            data = json.loads(action.data)
-            action_data = data["data"]["action_data"]
-            if action.name == "request_generator":
-                header_hash = bytes32(hexstr_to_bytes(action_data["header_hash"]))
-                height = uint32(action_data["height"])
-                msg = Message(
-                    "request_generator",
-                    wallet_protocol.RequestGenerator(height, header_hash),
-                )
-                out_msg = OutboundMessage(NodeType.FULL_NODE, msg, Delivery.BROADCAST)
-                result.append(out_msg)
+        for height, header_hash in params:
+            msg = Message(
+                "request_generator",
+                wallet_protocol.RequestGenerator(height, header_hash),
+            )
+            result.append(OutboundMessage(NodeType.FULL_NODE, msg, Delivery.BROADCAST))
 
         return result
 
@@ -345,37 +378,48 @@ class WalletNode:
     async def _periodically_check_full_node(self):
         tries = 0
         while not self._shut_down and tries < 5:
-            if self._has_full_node():
+            if await self._has_full_node():
                 await self.wallet_peers.ensure_is_closed()
                 break
             tries += 1
             await asyncio.sleep(180)
 
-    def _has_full_node(self) -> bool:
+    async def _resolve_full_node(self, full_node_peer: PeerInfo) -> PeerInfo:
+        """
+        Resolves the host of the configured full node, without blocking the event loop. The result
+        is cached, since this is polled periodically.
+        """
+        if self._resolved_full_node is not None:
+            full_node_resolved, resolved_time = self._resolved_full_node
+            if time.time() - resolved_time < 300:
+                return full_node_resolved
+        addresses = await asyncio.get_event_loop().getaddrinfo(
+            full_node_peer.host, full_node_peer.port, family=socket.AF_INET
+        )
+        full_node_resolved = PeerInfo(str(addresses[0][4][0]), full_node_peer.port)
+        self._resolved_full_node = (full_node_resolved, time.time())
+        return full_node_resolved
+
+    async def _has_full_node(self) -> bool:
         if "full_node_peer" in self.config:
             full_node_peer = PeerInfo(
                 self.config["full_node_peer"]["host"],
                 self.config["full_node_peer"]["port"],
             )
+            # Peer info of each connection is computed once, since it allocates a new PeerInfo
             peers = [
-                c.get_peer_info()
+                (c.get_peer_info(), c)
                 for c in self.global_connections.get_full_node_connections()
             ]
-            full_node_resolved = PeerInfo(
-                socket.gethostbyname(full_node_peer.host), full_node_peer.port
-            )
-            if full_node_peer in peers or full_node_resolved in peers:
+            full_node_resolved = await self._resolve_full_node(full_node_peer)
+            keep = {full_node_peer, full_node_resolved}
+            if any(peer_info in keep for peer_info, _ in peers):
                 self.log.info(
                     f"Will not attempt to connect to other nodes, already connected to {full_node_peer}"
                 )
-                for connection in self.global_connections.get_full_node_connections():
-                    if (
-                        connection.get_peer_info() != full_node_peer
-                        and connection.get_peer_info() != full_node_resolved
-                    ):
-                        self.log.info(
-                            f"Closing unnecessary connection to {connection.get_peer_info()}."
-                        )
+                for peer_info, connection in peers:
+                    if peer_info not in keep:
+                        self.log.info(f"Closing unnecessary connection to {peer_info}.")
                         self.global_connections.close(connection)
                 return True
         return False
@@ -386,7 +430,7 @@ class WalletNode:
         request: introducer_protocol.RespondPeers,
         peer_info: PeerInfo,
     ) -> OutboundMessageGenerator:
-        if not self._has_full_node():
+        if not await self._has_full_node():
             await self.wallet_peers.respond_peers(request, peer_info, False)
         else:
             await self.wallet_peers.ensure_is_closed()
@@ -398,7 +442,7 @@ class WalletNode:
         request: full_node_protocol.RespondPeers,
         peer_info: PeerInfo,
     ):
-        if not self._has_full_node():
+        if not await self._has_full_node():
             await self.wallet_peers.respond_peers(request, peer_info, True)
         else:
             await self.wallet_peers.ensure_is_closed()
@@ -420,6 +464,8 @@ class WalletNode:
         self.header_hashes_error = False
         self.proof_hashes = []
         self.potential_header_hashes = {}
+        header_hashes_received = asyncio.Event()
+        self.header_hashes_received = header_hashes_received
         genesis = FullBlock.from_bytes(self.constants.GENESIS_BLOCK)
         genesis_challenge = genesis.proof_of_space.challenge_hash
         request_header_hashes = wallet_protocol.RequestAllHeaderHashesAfter(
@@ -433,17 +479,17 @@ class WalletNode:
         timeout = 50
         sleep_interval = 3
         sleep_interval_short = 1
-        start_wait = time.time()
-        while time.time() - start_wait < timeout:
-            if self._shut_down:
-                return
-            if self.header_hashes_error:
-                raise ValueError(
-                    f"Received error from full node while fetching hashes from {request_header_hashes}."
-                )
-            if len(self.header_hashes) > 0:
-                break
-            await asyncio.sleep(0.5)
+        try:
+            await asyncio.wait_for(header_hashes_received.wait(), timeout=timeout)
+        # https://github.com/python/cpython/pull/13528
+        except (concurrent.futures.TimeoutError, asyncio.TimeoutError):
+            pass
+        if self._shut_down:
+            return
+        if self.header_hashes_error:
+            raise ValueError(
+                f"Received error from full node while fetching hashes from {request_header_hashes}."
+            )
         if len(self.header_hashes) == 0:
             raise TimeoutError("Took too long to fetch header hashes.")
 
@@ -469,8 +515,8 @@ class WalletNode:
         self.log.info(
             f"Fork point: {fork_point_hash} at height {fork_point_height}. Will sync up to {tip_height}"
         )
-        for height in range(0, tip_height + 1):
-            self.potential_blocks_received[uint32(height)] = asyncio.Event()
+        self.potential_blocks_received = bytearray((tip_height // 8) + 1)
+        self.potential_blocks_cond = asyncio.Condition()
 
         header_validate_start_height: uint32
         if self.config["starting_height"] == 0:
@@ -478,54 +524,72 @@ class WalletNode:
         else:
             # Request all proof hashes
             request_proof_hashes = wallet_protocol.RequestAllProofHashes()
+            proof_hashes_received = asyncio.Event()
+            self.proof_hashes_received = proof_hashes_received
             yield OutboundMessage(
                 NodeType.FULL_NODE,
                 Message("request_all_proof_hashes", request_proof_hashes),
                 Delivery.RESPOND,
             )
-            start_wait = time.time()
-            while time.time() - start_wait < timeout:
-                if self._shut_down:
-                    return
-                if len(self.proof_hashes) > 0:
-                    break
-                await asyncio.sleep(0.5)
+            try:
+                await asyncio.wait_for(proof_hashes_received.wait(), timeout=timeout)
+            # https://github.com/python/cpython/pull/13528
+            except (concurrent.futures.TimeoutError, asyncio.TimeoutError):
+                pass
+            if self._shut_down:
+                return
             if len(self.proof_hashes) == 0:
                 raise TimeoutError("Took too long to fetch proof hashes.")
             if len(self.proof_hashes) < tip_height:
                 raise ValueError("Not enough proof hashes fetched.")
 
-            # Creates map from height to difficulty
-            heights: List[uint32] = []
-            difficulty_weights: List[uint64] = []
+            # Creates map from height to difficulty. Only odd heights are sampled, and the difficulty
+            # only changes at a few heights, so heights are grouped in segments of equal difficulty.
+            difficulty_changes: List[Tuple[int, uint64]] = [
+                (i, proof_hash[1])
+                for i, proof_hash in enumerate(self.proof_hashes[:tip_height])
+                if proof_hash[1] is not None
+            ]
+            first_odd_height = (fork_point_height + 2) | 1
+            segments: List[range] = []
+            segment_weights: List[int] = []
             difficulty: uint64
-            for i in range(tip_height):
-                if self.proof_hashes[i][1] is not None:
-                    difficulty = self.proof_hashes[i][1]
-                if i > (fork_point_height + 1) and i % 2 == 1:  # Only add odd heights
-                    heights.append(uint32(i))
-                    difficulty_weights.append(difficulty)
-
-            # Randomly sample based on difficulty
-            query_heights_odd = sorted(
-                list(
-                    set(
-                        random.choices(
-                            heights, difficulty_weights, k=min(100, len(heights))
-                        )
-                    )
+            for index, (change_height, difficulty) in enumerate(difficulty_changes):
+                if index + 1 < len(difficulty_changes):
+                    segment_end = difficulty_changes[index + 1][0]
+                else:
+                    segment_end = tip_height
+                segment = range(
+                    max(change_height, first_odd_height) | 1, segment_end, 2
                 )
+                if len(segment) > 0:
+                    segments.append(segment)
+                    segment_weights.append(difficulty * len(segment))
+            num_heights = sum(len(segment) for segment in segments)
+
+            # Randomly sample based on difficulty. A segment is picked with probability proportional
+            # to its total difficulty, and then a height uniformly within it, which weighs each height
+            # by its difficulty.
+            sampled_segments = random.choices(
+                segments, segment_weights, k=min(100, num_heights)
             )
-            query_heights: List[uint32] = []
+            query_heights_odd: List[uint32] = [
+                uint32(h)
+                for h in sorted(
+                    set(random.choice(segment) for segment in sampled_segments)
+                )
+            ]
+            # Heights are plain ints in the sync loops, uint32 is only needed in messages and records
+            query_heights: List[int] = []
 
             for odd_height in query_heights_odd:
-                query_heights += [uint32(odd_height - 1), odd_height]
+                query_heights += [odd_height - 1, odd_height]
 
             # Send requests for these heights
             # Verify these proofs
             last_request_time = float(0)
-            highest_height_requested = uint32(0)
-            request_made = False
+            highest_height_requested = 0
+            num_sync_batches = self.config["num_sync_batches"]
 
             for height_index in range(len(query_heights)):
                 total_time_slept = 0
@@ -535,52 +599,25 @@ class WalletNode:
                     if total_time_slept > timeout:
                         raise TimeoutError("Took too long to fetch blocks")
 
-                    # Request batches that we don't have yet
-                    for batch_start_index in range(
-                        height_index,
-                        min(
-                            height_index + self.config["num_sync_batches"],
-                            len(query_heights),
-                        ),
-                    ):
-                        if self._shut_down:
-                            return
-                        blocks_missing = not self.potential_blocks_received[
-                            uint32(query_heights[batch_start_index])
-                        ].is_set()
+                    # Request batches that we don't have yet, coalesced into one message per run of heights
+                    retry_missing = time.time() - last_request_time > sleep_interval
+                    heights_to_request: List[int] = []
+                    for query_height in query_heights[
+                        height_index : height_index + num_sync_batches
+                    ]:
                         if (
-                            time.time() - last_request_time > sleep_interval
-                            and blocks_missing
-                        ) or (
-                            query_heights[batch_start_index]
-                        ) > highest_height_requested:
-                            self.log.info(
-                                f"Requesting sync header {query_heights[batch_start_index]}"
-                            )
-                            if (
-                                query_heights[batch_start_index]
-                                > highest_height_requested
-                            ):
-                                highest_height_requested = uint32(
-                                    query_heights[batch_start_index]
-                                )
-                            request_made = True
-                            request_header = wallet_protocol.RequestHeader(
-                                uint32(query_heights[batch_start_index]),
-                                self.header_hashes[query_heights[batch_start_index]],
-                            )
-                            yield OutboundMessage(
-                                NodeType.FULL_NODE,
-                                Message("request_header", request_header),
-                                Delivery.RANDOM,
-                            )
-                    if request_made:
+                            retry_missing
+                            and not self._potential_block_received(query_height)
+                        ) or query_height > highest_height_requested:
+                            heights_to_request.append(query_height)
+                            if query_height > highest_height_requested:
+                                highest_height_requested = query_height
+                    if len(heights_to_request) > 0:
+                        for msg in self._request_headers_messages(heights_to_request):
+                            yield msg
                         last_request_time = time.time()
-                        request_made = False
                     try:
-                        aw = self.potential_blocks_received[
-                            uint32(query_heights[height_index])
-                        ].wait()
+                        aw = self._wait_for_potential_block(query_heights[height_index])
                         await asyncio.wait_for(aw, timeout=sleep_interval)
                         break
                     # https://github.com/python/cpython/pull/13528
@@ -645,99 +682,144 @@ class WalletNode:
                 f"Fast sync successful up to height {header_validate_start_height}"
             )
 
-        # Download headers in batches, and verify them as they come in. We download a few batches ahead,
-        # in case there are delays. TODO(mariano): optimize sync by pipelining
+        # Download headers in batches, and verify them as they come in. A window of num_sync_batches heights
+        # after the checkpoint is kept in flight. The checkpoint advances in order, as soon as its header is
+        # added to the chain, while the rest of the window keeps downloading.
         last_request_time = float(0)
-        highest_height_requested = uint32(0)
-        request_made = False
+        highest_height_requested = 0
+        height_checkpoint = header_validate_start_height + 1
+        total_time_slept = 0
 
-        for height_checkpoint in range(
-            header_validate_start_height + 1, tip_height + 1
-        ):
-            total_time_slept = 0
-            while True:
-                # Request batches that we don't have yet
-                for batch_start in range(
-                    height_checkpoint,
-                    min(
-                        height_checkpoint + self.config["num_sync_batches"],
-                        tip_height + 1,
-                    ),
-                ):
-                    if self._shut_down:
-                        return
-                    if total_time_slept > timeout:
-                        raise TimeoutError("Took too long to fetch blocks")
-                    batch_end = min(batch_start + 1, tip_height + 1)
-                    blocks_missing = any(
-                        [
-                            not (self.potential_blocks_received[uint32(h)]).is_set()
-                            for h in range(batch_start, batch_end)
-                        ]
-                    )
-                    if (
-                        time.time() - last_request_time > sleep_interval
-                        and blocks_missing
-                    ) or (batch_end - 1) > highest_height_requested:
-                        self.log.info(f"Requesting sync header {batch_start}")
-                        if batch_end - 1 > highest_height_requested:
-                            highest_height_requested = uint32(batch_end - 1)
-                        request_made = True
-                        request_header = wallet_protocol.RequestHeader(
-                            uint32(batch_start),
-                            self.header_hashes[batch_start],
-                        )
-                        yield OutboundMessage(
-                            NodeType.FULL_NODE,
-                            Message("request_header", request_header),
-                            Delivery.RANDOM,
-                        )
-                if request_made:
-                    last_request_time = time.time()
-                    request_made = False
-
-                awaitables = [
-                    self.potential_blocks_received[uint32(height_checkpoint)].wait()
-                ]
-                future = asyncio.gather(*awaitables, return_exceptions=True)
+        while height_checkpoint <= tip_height:
+            if self._shut_down:
+                return
+            if total_time_slept > timeout:
+                raise TimeoutError("Took too long to fetch blocks")
+            window = range(
+                height_checkpoint,
+                min(
+                    height_checkpoint + self.config["num_sync_batches"], tip_height + 1
+                ),
+            )
+            missing_heights = [
+                h for h in window if not self._potential_block_received(h)
+            ]
+
+            # Request the heights in the window that we don't have yet, with one message per run of heights
+            retry_missing = time.time() - last_request_time > sleep_interval
+            heights_to_request = [
+                h
+                for h in missing_heights
+                if retry_missing or h > highest_height_requested
+            ]
+            if len(heights_to_request) > 0:
+                highest_height_requested = max(
+                    highest_height_requested, heights_to_request[-1]
+                )
+                for msg in self._request_headers_messages(heights_to_request):
+                    yield msg
+                last_request_time = time.time()
+
+            if len(missing_heights) > 0 and missing_heights[0] == height_checkpoint:
+                # Wakes up as soon as any header of the window arrives, to slide the window
                 try:
-                    await asyncio.wait_for(future, timeout=sleep_interval)
+                    await asyncio.wait_for(
+                        self._wait_for_potential_blocks(missing_heights),
+                        timeout=sleep_interval,
+                    )
                 # https://github.com/python/cpython/pull/13528
                 except (concurrent.futures.TimeoutError, asyncio.TimeoutError):
-                    try:
-                        await future
-                    except asyncio.CancelledError:
-                        pass
                     total_time_slept += sleep_interval
                     self.log.info("Did not receive desired headers")
+                continue
+
+            # Succesfully downloaded header. Now confirm it's added to chain.
+            hh = self.potential_header_hashes[height_checkpoint]
+            if hh not in self.wallet_state_manager.block_records:
+                # Not added to chain yet. Try again soon.
+                await asyncio.sleep(sleep_interval_short)
+                if self._shut_down:
+                    return
+                total_time_slept += sleep_interval_short
+                if hh not in self.wallet_state_manager.block_records:
+                    cached_block = self.cached_blocks[hh]
+                    hb = cached_block.header_block()
+                    self.log.warning(
+                        f"Received header, but it has not been added to chain. Retrying. {hb.height}"
+                    )
+                    respond_header_msg = wallet_protocol.RespondHeader(
+                        hb, cached_block.transactions_filter
+                    )
+                    async for msg in self.respond_header(respond_header_msg):
+                        yield msg
                     continue
 
-                # Succesfully downloaded header. Now confirm it's added to chain.
-                hh = self.potential_header_hashes[height_checkpoint]
-                if hh in self.wallet_state_manager.block_records:
-                    # Successfully added the block to chain
-                    break
-                else:
-                    # Not added to chain yet. Try again soon.
-                    await asyncio.sleep(sleep_interval_short)
-                    if self._shut_down:
-                        return
-                    total_time_slept += sleep_interval_short
-                    if hh in self.wallet_state_manager.block_records:
-                        break
-                    else:
-                        _, hb, tfilter = self.cached_blocks[hh]
-                        self.log.warning(
-                            f"Received header, but it has not been added to chain. Retrying. {hb.height}"
-                        )
-                        respond_header_msg = wallet_protocol.RespondHeader(hb, tfilter)
-                        async for msg in self.respond_header(respond_header_msg):
-                            yield msg
+            # Successfully added the block to chain
+            height_checkpoint += 1
+            total_time_slept = 0
 
         self.log.info(
             f"Finished sync process up to height {max(self.wallet_state_manager.height_to_hash.keys())}"
         )
 
+    def _request_headers_messages(self, heights: List[int]) -> List[OutboundMessage]:
+        """
+        Creates the messages to request the headers at the given (sorted) heights during sync. Each run of
+        consecutive heights is requested with a single RequestHeaders message, of at most
+        max_headers_per_request heights.
+        """
+        messages: List[OutboundMessage] = []
+        run_start = 0
+        for i in range(1, len(heights) + 1):
+            if (
+                i < len(heights)
+                and heights[i] == heights[i - 1] + 1
+                and i - run_start < wallet_protocol.max_headers_per_request
+            ):
+                continue
+            start_height, end_height = heights[run_start], heights[i - 1]
+            self.log.info(f"Requesting sync headers {start_height} to {end_height}")
+            request_headers = wallet_protocol.RequestHeaders(
+                uint32(start_height),
+                uint32(end_height),
+                self.header_hashes[start_height : end_height + 1],
+            )
+            messages.append(
+                OutboundMessage(
+                    NodeType.FULL_NODE,
+                    Message("request_headers", request_headers),
+                    Delivery.RANDOM,
+                )
+            )
+            run_start = i
+        return messages
+
+    def _potential_block_received(self, height: int) -> bool:
+        return bool(self.potential_blocks_received[height >> 3] & (1 << (height & 7)))
+
+    async def _set_potential_block_received(self, height: int):
+        assert self.potential_blocks_cond is not None
+        async with self.potential_blocks_cond:
+            self.potential_blocks_received[height >> 3] |= 1 << (height & 7)
+            self.potential_blocks_cond.notify_all()
+
+    async def _wait_for_potential_block(self, height: int):
+        assert self.potential_blocks_cond is not None
+        async with self.potential_blocks_cond:
+            await self.potential_blocks_cond.wait_for(
+                lambda: self._potential_block_received(height)
+            )
+
+    async def _wait_for_potential_blocks(self, heights: List[int]):
+        """
+        Waits until any of the heights is received.
+        """
+        assert self.potential_blocks_cond is not None
+        async with self.potential_blocks_cond:
+            await self.potential_blocks_cond.wait_for(
+                lambda: any(self._potential_block_received(h) for h in heights)
+            )
+
     async def _block_finished(
         self,
         block_record: BlockRecord,
@@ -771,26 +853,37 @@ class WalletNode:
             self.log.info(
                 f"Updated LCA to {block_record.header_hash} at height {block_record.height}"
             )
-            # Removes outdated cached blocks if we're not syncing
-            if not self.wallet_state_manager.sync_mode:
-                remove_header_hashes = []
-                for header_hash in self.cached_blocks:
-                    if (
-                        block_record.height - self.cached_blocks[header_hash][0].height
-                        > 100
-                    ):
-                        remove_header_hashes.append(header_hash)
-                for header_hash in remove_header_hashes:
-                    del self.cached_blocks[header_hash]
+            # Removes outdated cached blocks, also while syncing, so the cache does not grow with the chain
+            self._evict_cached(block_record.height - self.cached_blocks_depth)
         else:
             raise RuntimeError("Invalid state")
 
         # Now for the cases of already have, orphan, and added to head, move on to the next block
-        if block_record.header_hash in self.future_block_hashes:
-            new_hh = self.future_block_hashes[block_record.header_hash]
-            _, new_hb, new_tfilter = self.cached_blocks[new_hh]
-            return wallet_protocol.RespondHeader(new_hb, new_tfilter)
-        return None
+        cached_block = self.cached_blocks.get(block_record.header_hash)
+        if cached_block is None or cached_block.next_header_hash is None:
+            return None
+        new_cached_block = self.cached_blocks.get(cached_block.next_header_hash)
+        if new_cached_block is None:
+            return None
+        return wallet_protocol.RespondHeader(
+            new_cached_block.header_block(), new_cached_block.transactions_filter
+        )
+
+    def _evict_cached(self, watermark: int):
+        """
+        Removes the cached blocks and potential header hashes below the watermark height. Future block
+        hashes are keyed by the parent of a cached block, so the link from the parent of each evicted
+        block is removed as well, which also clears orphans whose parent never arrives.
+        """
+        heights = self.cached_block_heights
+        while len(heights) > 0 and heights[0][0] < watermark:
+            height, header_hash = heapq.heappop(heights)
+            cached_block = self.cached_blocks.pop(header_hash, None)
+            if cached_block is not None:
+                prev_header_hash = cached_block.record.prev_header_hash
+                if self.future_block_hashes.get(prev_header_hash) == header_hash:
+                    del self.future_block_hashes[prev_header_hash]
+            self.potential_header_hashes.pop(height, None)
 
     @api_request
     async def transaction_ack_with_peer_name(
@@ -834,6 +927,8 @@ class WalletNode:
             self.log.warning("Receiving proof hashes while not syncing.")
             return
         self.proof_hashes = response.hashes
+        if self.proof_hashes_received is not None:
+            self.proof_hashes_received.set()
 
     @api_request
     async def respond_all_header_hashes_after(
@@ -849,6 +944,8 @@ class WalletNode:
             self.log.warning("Receiving header hashes while not syncing.")
             return
         self.header_hashes = response.hashes
+        if self.header_hashes_received is not None:
+            self.header_hashes_received.set()
 
     @api_request
     async def reject_all_header_hashes_after_request(
@@ -861,6 +958,8 @@ class WalletNode:
         if self.wallet_state_manager is None or self.backup_initialized is False:
             return
         self.header_hashes_error = True
+        if self.header_hashes_received is not None:
+            self.header_hashes_received.set()
 
     @api_request
     async def new_lca(self, request: wallet_protocol.NewLCA):
@@ -916,6 +1015,10 @@ class WalletNode:
         """
         if self.wallet_state_manager is None or self.backup_initialized is False:
             return
+        # The block records dict is never replaced, but the LCA and sync mode can change while we await,
+        # so those are read where they are used
+        wallet_state_manager = self.wallet_state_manager
+        block_records = wallet_state_manager.block_records
         while True:
             if self._shut_down:
                 return
@@ -923,17 +1026,20 @@ class WalletNode:
             # process the next block, if it exists.
 
             block = response.header_block
+            # The header hash is computed by serializing and hashing the header, so only do it once
+            header_hash = block.header_hash
+            height = block.height
 
             # If we already have, return
-            if block.header_hash in self.wallet_state_manager.block_records:
+            if header_hash in block_records:
                 return
-            if block.height < 1:
+            if height < 1:
                 return
 
             block_record = BlockRecord(
-                block.header_hash,
+                header_hash,
                 block.prev_header_hash,
-                block.height,
+                height,
                 block.weight,
                 None,
                 None,
@@ -942,40 +1048,52 @@ class WalletNode:
                 response.header_block.header.data.timestamp,
             )
 
-            if self.wallet_state_manager.sync_mode:
-                if uint32(block.height) in self.potential_blocks_received:
-                    self.potential_blocks_received[uint32(block.height)].set()
-                    self.potential_header_hashes[block.height] = block.header_hash
-
-            # Caches the block so we can finalize it when additions and removals arrive
-            self.cached_blocks[block_record.header_hash] = (
-                block_record,
-                block,
-                response.transactions_filter,
-            )
+            if wallet_state_manager.sync_mode:
+                if height < len(self.potential_blocks_received) * 8:
+                    await self._set_potential_block_received(height)
+                    self.potential_header_hashes[height] = header_hash
+
+            # Caches the block so we can finalize it when additions and removals arrive. A block that is
+            # already cached is left as is, since respond_additions and respond_removals keep the cached
+            # block across awaits, and its record might already have the additions
+            if header_hash not in self.cached_blocks:
+                heapq.heappush(self.cached_block_heights, (height, header_hash))
+                # A child of this block might have arrived before it
+                self.cached_blocks[header_hash] = CachedBlock(
+                    block_record,
+                    bytes(block),
+                    response.transactions_filter,
+                    self.future_block_hashes.pop(header_hash, None),
+                )
 
-            if block.prev_header_hash not in self.wallet_state_manager.block_records:
+            if block.prev_header_hash not in block_records:
                 # We do not have the previous block record, so wait for that. When the previous gets added to chain,
                 # this method will get called again and we can continue. During sync, the previous blocks are already
                 # requested. During normal operation, this might not be the case.
-                self.future_block_hashes[block.prev_header_hash] = block.header_hash
+                prev_cached_block = self.cached_blocks.get(block.prev_header_hash)
+                if prev_cached_block is not None:
+                    # The previous block is already being processed, and continues with this one when it
+                    # is added, so there is nothing to request
+                    prev_cached_block.next_header_hash = header_hash
+                    return
+                self.future_block_hashes[block.prev_header_hash] = header_hash
 
-                lca = self.wallet_state_manager.block_records[
-                    self.wallet_state_manager.lca
-                ]
+                lca = block_records[wallet_state_manager.lca]
                 if (
                     block_record.height - lca.height < self.short_sync_threshold
-                    and not self.wallet_state_manager.sync_mode
+                    and not wallet_state_manager.sync_mode
                 ):
-                    # Only requests the previous block if we are not in sync mode, close to the new block,
-                    # and don't have prev
-                    header_request = wallet_protocol.RequestHeader(
+                    # Only requests the previous blocks if we are not in sync mode, close to the new block,
+                    # and don't have prev. The missing ancestors down to the LCA are requested together,
+                    # instead of one round trip per block.
+                    header_request = wallet_protocol.RequestHeaderAncestors(
                         uint32(block_record.height - 1),
                         block_record.prev_header_hash,
+                        uint32(max(1, block_record.height - 1 - lca.height)),
                     )
                     yield OutboundMessage(
                         NodeType.FULL_NODE,
-                        Message("request_header", header_request),
+                        Message("request_header_ancestors", header_request),
                         Delivery.RESPOND,
                     )
                 return
@@ -984,12 +1102,12 @@ class WalletNode:
             (
                 additions,
                 removals,
-            ) = await self.wallet_state_manager.get_filter_additions_removals(
+            ) = await wallet_state_manager.get_filter_additions_removals(
                 block_record, response.transactions_filter
             )
             if len(additions) > 0 or len(removals) > 0:
                 request_a = wallet_protocol.RequestAdditions(
-                    block.height, block.header_hash, additions
+                    height, header_hash, additions
                 )
                 yield OutboundMessage(
                     NodeType.FULL_NODE,
@@ -999,17 +1117,7 @@ class WalletNode:
                 return
 
             # If we don't have any transactions in filter, don't fetch, and finish the block
-            block_record = BlockRecord(
-                block_record.header_hash,
-                block_record.prev_header_hash,
-                block_record.height,
-                block_record.weight,
-                [],
-                [],
-                block_record.total_iters,
-                block_record.new_challenge_hash,
-                block_record.timestamp,
-            )
+            block_record = replace(block_record, additions=[], removals=[])
             respond_header_msg: Optional[
                 wallet_protocol.RespondHeader
             ] = await self._block_finished(
@@ -1042,12 +1150,13 @@ class WalletNode:
             return
         if self._shut_down:
             return
-        if response.header_hash not in self.cached_blocks:
+        cached_block = self.cached_blocks.get(response.header_hash)
+        if cached_block is None:
             self.log.warning("Do not have header for additions")
             return
-        block_record, header_block, transaction_filter = self.cached_blocks[
-            response.header_hash
-        ]
+        block_record = cached_block.record
+        transaction_filter = cached_block.transactions_filter
+        header_block = cached_block.header_block()
         assert response.height == block_record.height
 
         additions: List[Coin]
@@ -1073,53 +1182,33 @@ class WalletNode:
                 return
         else:
             # This means the full node has responded only with the relevant additions
-            # for our wallet. Each merkle proof must be verified.
+            # for our wallet. Each merkle proof must be verified, they are verified together since they
+            # share the same root.
             additions = []
+            proofs: List[Tuple[bytes32, bytes, bool]] = []
             assert len(response.coins) == len(response.proofs)
             for i in range(len(response.coins)):
                 assert response.coins[i][0] == response.proofs[i][0]
                 coin_list_1: List[Coin] = response.coins[i][1]
-                puzzle_hash_proof: bytes32 = response.proofs[i][1]
-                coin_list_proof: Optional[bytes32] = response.proofs[i][2]
+                puzzle_hash_proof: bytes = response.proofs[i][1]
+                coin_list_proof: Optional[bytes] = response.proofs[i][2]
                 if len(coin_list_1) == 0:
-                    # Verify exclusion proof for puzzle hash
-                    assert confirm_not_included_already_hashed(
-                        header_block.header.data.additions_root,
-                        response.coins[i][0],
-                        puzzle_hash_proof,
-                    )
+                    # Exclusion proof for puzzle hash
+                    proofs.append((response.coins[i][0], puzzle_hash_proof, False))
                 else:
-                    # Verify inclusion proof for puzzle hash
-                    assert confirm_included_already_hashed(
-                        header_block.header.data.additions_root,
-                        response.coins[i][0],
-                        puzzle_hash_proof,
-                    )
-                    # Verify inclusion proof for coin list
-                    assert confirm_included_already_hashed(
-                        header_block.header.data.additions_root,
-                        hash_coin_list(coin_list_1),
-                        coin_list_proof,
-                    )
+                    # Inclusion proof for puzzle hash
+                    proofs.append((response.coins[i][0], puzzle_hash_proof, True))
+                    # Inclusion proof for coin list
+                    assert coin_list_proof is not None
+                    proofs.append((hash_coin_list(coin_list_1), coin_list_proof, True))
                     for coin in coin_list_1:
                         assert coin.puzzle_hash == response.coins[i][0]
                     additions += coin_list_1
-        new_br = BlockRecord(
-            block_record.header_hash,
-            block_record.prev_header_hash,
-            block_record.height,
-            block_record.weight,
-            additions,
-            None,
-            block_record.total_iters,
-            header_block.challenge.get_hash(),
-            header_block.header.data.timestamp,
-        )
-        self.cached_blocks[response.header_hash] = (
-            new_br,
-            header_block,
-            transaction_filter,
-        )
+            assert confirm_all_already_hashed(
+                header_block.header.data.additions_root, proofs
+            )
+        new_br = replace(block_record, additions=additions, removals=None)
+        cached_block.record = new_br
 
         if transaction_filter is None:
             raise RuntimeError("Got additions for block with no transactions.")
@@ -1159,17 +1248,7 @@ class WalletNode:
         else:
             # We have collected all three things: header, additions, and removals (since there are no
             # relevant removals for us). Can proceed. Otherwise, we wait for the removals to arrive.
-            new_br = BlockRecord(
-                new_br.header_hash,
-                new_br.prev_header_hash,
-                new_br.height,
-                new_br.weight,
-                new_br.additions,
-                [],
-                new_br.total_iters,
-                new_br.new_challenge_hash,
-                new_br.timestamp,
-            )
+            new_br = replace(new_br, removals=[])
             respond_header_msg: Optional[
                 wallet_protocol.RespondHeader
             ] = await self._block_finished(new_br, header_block, transaction_filter)
@@ -1187,18 +1266,16 @@ class WalletNode:
             return
         if self._shut_down:
             return
-        if (
-            response.header_hash not in self.cached_blocks
-            or self.cached_blocks[response.header_hash][0].additions is None
-        ):
+        cached_block = self.cached_blocks.get(response.header_hash)
+        if cached_block is None or cached_block.record.additions is None:
             self.log.warning(
                 "Do not have header for removals, or do not have additions"
             )
             return
 
-        block_record, header_block, transaction_filter = self.cached_blocks[
-            response.header_hash
-        ]
+        block_record = cached_block.record
+        transaction_filter = cached_block.transactions_filter
+        header_block = cached_block.header_block()
         assert response.height == block_record.height
 
         all_coins: List[Coin] = []
@@ -1220,45 +1297,28 @@ class WalletNode:
 
         else:
             # This means the full node has responded only with the relevant removals
-            # for our wallet. Each merkle proof must be verified.
+            # for our wallet. Each merkle proof must be verified, they are verified together since they
+            # share the same root.
+            proofs: List[Tuple[bytes32, bytes, bool]] = []
             assert len(response.coins) == len(response.proofs)
             for i in range(len(response.coins)):
                 # Coins are in the same order as proofs
                 assert response.coins[i][0] == response.proofs[i][0]
                 coin = response.coins[i][1]
                 if coin is None:
-                    # Verifies merkle proof of exclusion
-                    assert confirm_not_included_already_hashed(
-                        header_block.header.data.removals_root,
-                        response.coins[i][0],
-                        response.proofs[i][1],
-                    )
+                    # Merkle proof of exclusion
+                    proofs.append((response.coins[i][0], response.proofs[i][1], False))
                 else:
-                    # Verifies merkle proof of inclusion of coin name
+                    # Merkle proof of inclusion of coin name
                     assert response.coins[i][0] == coin.name()
-                    assert confirm_included_already_hashed(
-                        header_block.header.data.removals_root,
-                        coin.name(),
-                        response.proofs[i][1],
-                    )
+                    proofs.append((coin.name(), response.proofs[i][1], True))
+            assert confirm_all_already_hashed(
+                header_block.header.data.removals_root, proofs
+            )
 
-        new_br = BlockRecord(
-            block_record.header_hash,
-            block_record.prev_header_hash,
-            block_record.height,
-            block_record.weight,
-            block_record.additions,
-            all_coins,
-            block_record.total_iters,
-            header_block.challenge.get_hash(),
-            header_block.header.data.timestamp,
-        )
+        new_br = replace(block_record, removals=all_coins)
 
-        self.cached_blocks[response.header_hash] = (
-            new_br,
-            header_block,
-            transaction_filter,
-        )
+        cached_block.record = new_br
 
         # We have collected all three things: header, additions, and removals. Can proceed.
         respond_header_msg: Optional[
@@ -22,6 +22,7 @@ from src.types.header_block import HeaderBlock
 from src.util.byte_types import hexstr_to_bytes
 from src.util.ints import uint32, uint64
 from src.util.hash import std_hash
+from src.wallet.cached_block import CachedBlock
 from src.wallet.cc_wallet.cc_wallet import CCWallet
 from src.wallet.key_val_store import KeyValStore
 from src.wallet.settings.user_settings import UserSettings
@@ -1093,7 +1094,7 @@ class WalletStateManager:
         self,
         all_proof_hashes: List[Tuple[bytes32, Optional[uint64], Optional[uint64]]],
         heights: List[uint32],
-        cached_blocks: Dict[bytes32, Tuple[BlockRecord, HeaderBlock, Optional[bytes]]],
+        cached_blocks: Dict[bytes32, CachedBlock],
         potential_header_hashes: Dict[uint32, bytes32],
     ) -> bool:
         """
@@ -1108,7 +1109,7 @@ class WalletStateManager:
             prev_height = uint32(height - 1)
             # Get previous header block
             prev_hh = potential_header_hashes[prev_height]
-            _, prev_header_block, _ = cached_blocks[prev_hh]
+            prev_header_block = cached_blocks[prev_hh].header_block()
 
             # Validate proof hash of previous header block
             if (
@@ -1151,7 +1152,7 @@ class WalletStateManager:
 
             # Get header block
             hh = potential_header_hashes[height]
-            _, header_block, _ = cached_blocks[hh]
+            header_block = cached_blocks[hh].header_block()
 
             # Validate challenge hash is == pospace challenge hash
             if challenge_hash != header_block.proof_of_space.challenge_hash:
@@ -1556,9 +1557,18 @@ class WalletStateManager:
         callback: str,
         done: bool,
         data: str,
+        params_height: Optional[uint32] = None,
+        params_hdrhash: Optional[bytes32] = None,
     ):
         await self.action_store.create_action(
-            name, wallet_id, type, callback, done, data
+            name,
+            wallet_id,
+            type,
+            callback,
+            done,
+            data,
+            params_height,
+            params_hdrhash,
         )
         self.tx_pending_changed()
 
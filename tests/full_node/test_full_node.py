@@ -1007,6 +1007,122 @@ class TestWalletProtocol:
         assert msgs[0].message.data.height == 2
         assert msgs[0].message.data.header_hash == blocks[2].header_hash
 
+    @pytest.mark.asyncio
+    async def test_request_headers(self, two_nodes):
+        full_node_1, full_node_2, server_1, server_2 = two_nodes
+        num_blocks = 2
+        blocks = bt.get_consecutive_blocks(
+            test_constants, num_blocks, [], 10, seed=b"test_request_headers"
+        )
+        for block in blocks[:2]:
+            async for _ in full_node_1.respond_block(fnp.RespondBlock(block)):
+                pass
+
+        msgs = [
+            _
+            async for _ in full_node_1.request_headers(
+                wallet_protocol.RequestHeaders(
+                    uint32(0),
+                    uint32(2),
+                    [block.header_hash for block in blocks],
+                )
+            )
+        ]
+        assert len(msgs) == 3
+        for i in range(2):
+            assert isinstance(msgs[i].message.data, wallet_protocol.RespondHeader)
+            assert msgs[i].message.data.header_block.header == blocks[i].header
+        # Don't have
+        assert isinstance(msgs[2].message.data, wallet_protocol.RejectHeaderRequest)
+        assert msgs[2].message.data.height == 2
+
+        # Range does not match the number of hashes
+        msgs = [
+            _
+            async for _ in full_node_1.request_headers(
+                wallet_protocol.RequestHeaders(
+                    uint32(0), uint32(2), [blocks[0].header_hash]
+                )
+            )
+        ]
+        assert len(msgs) == 0
+
+        # Range is too long
+        max_headers = wallet_protocol.max_headers_per_request
+        msgs = [
+            _
+            async for _ in full_node_1.request_headers(
+                wallet_protocol.RequestHeaders(
+                    uint32(0),
+                    uint32(max_headers),
+                    [blocks[0].header_hash] * (max_headers + 1),
+                )
+            )
+        ]
+        assert len(msgs) == 0
+
+    @pytest.mark.asyncio
+    async def test_request_header_ancestors(self, two_nodes, monkeypatch):
+        full_node_1, full_node_2, server_1, server_2 = two_nodes
+        num_blocks = 4
+        blocks = bt.get_consecutive_blocks(
+            test_constants, num_blocks, [], 10, seed=b"test_request_header_ancestors"
+        )
+        for block in blocks[:3]:
+            async for _ in full_node_1.respond_block(fnp.RespondBlock(block)):
+                pass
+
+        msgs = [
+            _
+            async for _ in full_node_1.request_header_ancestors(
+                wallet_protocol.RequestHeaderAncestors(
+                    uint32(2), blocks[2].header_hash, uint32(2)
+                )
+            )
+        ]
+        # Oldest first
+        assert len(msgs) == 2
+        for i in range(2):
+            assert isinstance(msgs[i].message.data, wallet_protocol.RespondHeader)
+            assert msgs[i].message.data.header_block.header == blocks[i + 1].header
+
+        # Does not go past genesis
+        msgs = [
+            _
+            async for _ in full_node_1.request_header_ancestors(
+                wallet_protocol.RequestHeaderAncestors(
+                    uint32(2), blocks[2].header_hash, uint32(10)
+                )
+            )
+        ]
+        assert len(msgs) == 3
+
+        # Don't have
+        msgs = [
+            _
+            async for _ in full_node_1.request_header_ancestors(
+                wallet_protocol.RequestHeaderAncestors(
+                    uint32(3), blocks[3].header_hash, uint32(2)
+                )
+            )
+        ]
+        assert len(msgs) == 1
+        assert isinstance(msgs[0].message.data, wallet_protocol.RejectHeaderRequest)
+        assert msgs[0].message.data.height == 3
+
+        # Count is capped by the full node
+        monkeypatch.setattr(wallet_protocol, "max_header_ancestors", 2)
+        msgs = [
+            _
+            async for _ in full_node_1.request_header_ancestors(
+                wallet_protocol.RequestHeaderAncestors(
+                    uint32(2), blocks[2].header_hash, uint32(2 ** 32 - 1)
+                )
+            )
+        ]
+        assert len(msgs) == 2
+        assert msgs[0].message.data.header_block.header == blocks[1].header
+
     @pytest.mark.asyncio
     async def test_request_removals(self, two_nodes, wallet_blocks):
         full_node_1, full_node_2, server_1, server_2 = two_nodes
@@ -1,9 +1,11 @@
 import asyncio
+from collections import OrderedDict
 
 import pytest
 
 from src.full_node.bundle_tools import best_solution_program
 from src.full_node.cost_calculator import calculate_cost_of_program
+from src.full_node import mempool_check_conditions
 from src.full_node.mempool_check_conditions import get_name_puzzle_conditions
 from tests.setup_nodes import test_constants, bt
 
@@ -16,18 +18,25 @@ def event_loop():
     yield loop
 
 
+@pytest.fixture(scope="module")
+def sample_blocks():
+    """
+    Blocks are expensive to create, so they are shared by all the tests in this module.
+    """
+    num_blocks = 2
+    return bt.get_consecutive_blocks(
+        test_constants,
+        num_blocks,
+        [],
+        10,
+    )
+
+
 class TestCostCalculation:
     @pytest.mark.asyncio
-    async def test_basics(self):
+    async def test_basics(self, sample_blocks, monkeypatch):
         wallet_tool = bt.get_pool_wallet_tool()
-
-        num_blocks = 2
-        blocks = bt.get_consecutive_blocks(
-            test_constants,
-            num_blocks,
-            [],
-            10,
-        )
+        blocks = sample_blocks
 
         spend_bundle = wallet_tool.generate_signed_transaction(
             blocks[1].get_coinbase().amount,
@@ -41,9 +50,46 @@ class TestCostCalculation:
 
         error, npc_list, clvm_cost = calculate_cost_of_program(program, ratio)
 
+        # Counts the evaluations that miss the cache
+        evaluations = []
+        evaluate = mempool_check_conditions._evaluate_name_puzzle_conditions
+
+        def counting_evaluate(block_program):
+            evaluations.append(block_program)
+            return evaluate(block_program)
+
+        monkeypatch.setattr(
+            mempool_check_conditions,
+            "_evaluate_name_puzzle_conditions",
+            counting_evaluate,
+        )
+        monkeypatch.setattr(mempool_check_conditions, "_npc_cache", OrderedDict())
+        monkeypatch.setattr(mempool_check_conditions, "_npc_cache_bytes", 0)
+
         error, npc_list, cost = get_name_puzzle_conditions(program)
+        assert len(evaluations) == 1
+        assert len(npc_list) > 0
+
+        # Changing the returned list does not change the cached result
+        npc_list_copy = list(npc_list)
+        npc_list.clear()
+        npc_list = npc_list_copy
+
+        # Evaluated again from the cache, with the same result
+        assert get_name_puzzle_conditions(program) == (error, npc_list, cost)
+        assert len(evaluations) == 1
+        assert mempool_check_conditions._npc_cache_bytes > 0
+
+        # Results larger than the cache are not kept
+        monkeypatch.setattr(mempool_check_conditions, "_npc_cache", OrderedDict())
+        monkeypatch.setattr(mempool_check_conditions, "_npc_cache_bytes", 0)
+        monkeypatch.setattr(mempool_check_conditions, "NPC_CACHE_MAX_BYTES", 0)
+        assert get_name_puzzle_conditions(program) == (error, npc_list, cost)
+        assert get_name_puzzle_conditions(program) == (error, npc_list, cost)
+        assert len(evaluations) == 3
+        assert len(mempool_check_conditions._npc_cache) == 0
+
+        assert program.size_bytes == len(bytes(program))
 
         # Create condition + agg_sig_condition + length + cpu_cost
-        assert (
-            clvm_cost == 200 * ratio + 20 * ratio + len(bytes(program)) * ratio + cost
-        )
+        assert clvm_cost == 200 * ratio + 20 * ratio + program.size_bytes * ratio + cost
@@ -2,7 +2,11 @@ import asyncio
 
 import pytest
 
-from src.util.merkle_set import MerkleSet, confirm_included_already_hashed
+from src.util.merkle_set import (
+    MerkleSet,
+    confirm_all_already_hashed,
+    confirm_included_already_hashed,
+)
 from tests.setup_nodes import test_constants, bt
 
 
@@ -52,3 +56,35 @@ class TestMerkleSet:
 
         # Test if order of adding items change the outcome
         assert merkle_set.get_root() == merkle_set_reverse.get_root()
+
+    @pytest.mark.asyncio
+    async def test_confirm_all(self):
+        num_blocks = 10
+        blocks = bt.get_consecutive_blocks(
+            test_constants,
+            num_blocks,
+            [],
+            10,
+        )
+
+        merkle_set = MerkleSet()
+        for block in blocks:
+            merkle_set.add_already_hashed(block.get_coinbase().name())
+
+        proofs = []
+        for block in blocks:
+            for coin, included in [
+                (block.get_coinbase(), True),
+                (block.get_fees_coin(), False),
+            ]:
+                result, proof = merkle_set.is_included_already_hashed(coin.name())
+                assert result is included
+                proofs.append((coin.name(), proof, included))
+
+        assert confirm_all_already_hashed(merkle_set.get_root(), proofs)
+        assert confirm_all_already_hashed(merkle_set.get_root(), [])
+
+        # A single wrong proof fails the whole batch
+        name, proof, included = proofs[0]
+        proofs[0] = (name, proof, not included)
+        assert not confirm_all_already_hashed(merkle_set.get_root(), proofs)
@@ -0,0 +1,49 @@
+import unittest
+from secrets import token_bytes
+
+from src.protocols import wallet_protocol
+from src.util import cbor
+from src.util.ints import uint32
+
+
+class TestCbor(unittest.TestCase):
+    def test_dumps_message(self):
+        header_hash = token_bytes(32)
+        messages = [
+            (
+                "request_header",
+                wallet_protocol.RequestHeader(uint32(5), header_hash),
+            ),
+            (
+                "reject_header_request",
+                wallet_protocol.RejectHeaderRequest(uint32(2 ** 32 - 1), header_hash),
+            ),
+            (
+                "request_additions",
+                wallet_protocol.RequestAdditions(uint32(7), header_hash, None),
+            ),
+            # Function names longer than 23 bytes are encoded with a separate length byte
+            (
+                "respond_all_header_hashes_after",
+                wallet_protocol.RespondAllHeaderHashesAfter(
+                    uint32(0), header_hash, [token_bytes(32) for _ in range(30)]
+                ),
+            ),
+        ]
+        for function, data in messages:
+            for _ in range(2):
+                # Second time, the prefix is cached
+                encoded = cbor.dumps_message(function, data)
+                assert encoded == cbor.dumps({"f": function, "d": data})
+
+                decoded = cbor.loads(encoded)
+                assert decoded["f"] == function
+                assert type(data)(**decoded["d"]) == data
+
+        assert cbor.dumps_message("request_peers", "") == cbor.dumps(
+            {"f": "request_peers", "d": ""}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
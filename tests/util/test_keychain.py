@@ -40,6 +40,10 @@ class TesKeychain(unittest.TestCase):
         assert len(kc.get_all_public_keys()) == 2
         assert kc.get_all_private_keys()[0] == kc.get_first_private_key()
         assert kc.get_all_public_keys()[0] == kc.get_first_public_key()
+        for sk, ent in kc.get_all_private_keys():
+            fingerprint = sk.get_g1().get_fingerprint()
+            assert kc.get_private_key_by_fingerprint(fingerprint) == (sk, ent)
+        assert kc.get_private_key_by_fingerprint(1) is None
 
         assert len(kc.get_all_private_keys()) == 2
 
@@ -0,0 +1,109 @@
+import asyncio
+from pathlib import Path
+from secrets import token_bytes
+import aiosqlite
+import pytest
+from src.util.ints import uint32
+from src.util.json_util import dict_to_json_str
+from src.wallet.wallet_action_store import WalletActionStore
+from src.wallet.util.wallet_types import WalletType
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+def request_generator_data(height: int, header_hash: bytes) -> str:
+    return dict_to_json_str(
+        {
+            "data": {
+                "action_data": {
+                    "api_name": "request_generator",
+                    "height": height,
+                    "header_hash": header_hash,
+                }
+            }
+        }
+    )
+
+
+class TestWalletActionStore:
+    @pytest.mark.asyncio
+    async def test_action_params_migration(self):
+        db_filename = Path("wallet_action_store_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        db_connection = await aiosqlite.connect(db_filename)
+        try:
+            # Table as created before the params columns existed
+            await db_connection.execute(
+                (
+                    "CREATE TABLE action_queue("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                    " name text,"
+                    " wallet_id int,"
+                    " wallet_type int,"
+                    " wallet_callback text,"
+                    " done int,"
+                    " data text)"
+                )
+            )
+            header_hash_1 = token_bytes(32)
+            await db_connection.execute(
+                "INSERT INTO action_queue VALUES(?, ?, ?, ?, ?, ?, ?)",
+                (
+                    None,
+                    "request_generator",
+                    2,
+                    WalletType.COLOURED_COIN.value,
+                    "generator_received",
+                    False,
+                    request_generator_data(5, header_hash_1),
+                ),
+            )
+            await db_connection.commit()
+
+            store = await WalletActionStore.create(db_connection)
+
+            assert await store.get_pending_action_params("request_generator") == [
+                (uint32(5), header_hash_1)
+            ]
+
+            # Migrating again does nothing
+            store = await WalletActionStore.create(db_connection)
+            assert len(await store.get_pending_action_params("request_generator")) == 1
+
+            header_hash_2 = token_bytes(32)
+            await store.create_action(
+                "request_generator",
+                2,
+                WalletType.COLOURED_COIN.value,
+                "generator_received",
+                False,
+                request_generator_data(7, header_hash_2),
+                uint32(7),
+                header_hash_2,
+            )
+            assert await store.get_pending_action_params("request_generator") == [
+                (uint32(5), header_hash_1),
+                (uint32(7), header_hash_2),
+            ]
+            assert await store.get_pending_action_params("other_action") == []
+
+            await store.action_done(1)
+            assert await store.get_pending_action_params("request_generator") == [
+                (uint32(7), header_hash_2)
+            ]
+            action = await store.get_wallet_action(1)
+            assert action is not None and action.done
+
+        except AssertionError:
+            await db_connection.close()
+            db_filename.unlink()
+            raise
+        await db_connection.close()
+        db_filename.unlink()
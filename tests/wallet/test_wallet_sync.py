@@ -3,7 +3,7 @@ import asyncio
 import pytest
 
 from src.types.peer_info import PeerInfo
-from src.protocols import full_node_protocol
+from src.protocols import full_node_protocol, wallet_protocol
 from src.util.ints import uint16, uint64, uint32
 from tests.setup_nodes import setup_node_and_wallet, test_constants, bt
 from src.types.spend_bundle import SpendBundle
@@ -62,6 +62,20 @@ class TestWalletSync:
             200, wallet_height_at_least, True, wallet_node, num_blocks - 6
         )
 
+        # Cached blocks further than cached_blocks_depth below the LCA have been evicted
+        lca_height = wallet_node.wallet_state_manager.block_records[
+            wallet_node.wallet_state_manager.lca
+        ].height
+        assert lca_height > wallet_node.cached_blocks_depth
+        assert len(wallet_node.cached_blocks) < num_blocks - 6
+        assert len(wallet_node.cached_block_heights) == len(wallet_node.cached_blocks)
+        assert (
+            wallet_node.cached_block_heights[0][0]
+            >= lca_height - wallet_node.cached_blocks_depth
+        )
+        for header_hash in wallet_node.future_block_hashes.values():
+            assert header_hash in wallet_node.cached_blocks
+
         # Tests a reorg with the wallet
         blocks_reorg = bt.get_consecutive_blocks(test_constants, 15, blocks[:-5])
         for i in range(1, len(blocks_reorg)):
@@ -105,6 +119,85 @@ class TestWalletSync:
         await server_2.start_client(PeerInfo("localhost", uint16(server_1._port)), None)
         await time_out_assert(60, wallet_height_at_least, True, wallet_node, 3)
 
+    @pytest.mark.asyncio
+    async def test_short_sync_gap_wallet(self, wallet_node):
+        blocks = bt.get_consecutive_blocks(test_constants, 4, [], 10)
+        full_node_1, wallet_node, server_1, server_2 = wallet_node
+
+        for i in range(1, len(blocks)):
+            async for _ in full_node_1.respond_block(
+                full_node_protocol.RespondBlock(blocks[i])
+            ):
+                pass
+
+        await server_2.start_client(PeerInfo("localhost", uint16(server_1._port)), None)
+        await time_out_assert(60, wallet_height_at_least, True, wallet_node, 1)
+        server_2.global_connections.close_all_connections()
+
+        # A gap of several blocks, which is still lower than the short_sync in wallet_node
+        blocks = bt.get_consecutive_blocks(test_constants, 8, blocks, 10)
+        for i in range(1, len(blocks)):
+            async for _ in full_node_1.respond_block(
+                full_node_protocol.RespondBlock(blocks[i])
+            ):
+                pass
+
+        async def respond_header_messages(height):
+            header_msgs = [
+                _
+                async for _ in full_node_1.request_header(
+                    wallet_protocol.RequestHeader(
+                        uint32(height), blocks[height].header_hash
+                    )
+                )
+            ]
+            return [
+                _ async for _ in wallet_node.respond_header(header_msgs[0].message.data)
+            ]
+
+        async def deliver(wallet_msgs):
+            """
+            Passes the messages of the wallet to the full node, and its responses back to the wallet,
+            until there are none left. Returns the header requests made.
+            """
+            header_requests = []
+            while len(wallet_msgs) > 0:
+                msg = wallet_msgs.pop(0)
+                if msg.message.function.startswith("request_header"):
+                    header_requests.append(msg.message.data)
+                async for response in getattr(full_node_1, msg.message.function)(
+                    msg.message.data
+                ):
+                    wallet_msgs += [
+                        _
+                        async for _ in getattr(wallet_node, response.message.function)(
+                            response.message.data
+                        )
+                    ]
+            return header_requests
+
+        # The missing ancestors are requested together
+        msgs = await respond_header_messages(10)
+        assert len(msgs) == 1
+        assert msgs[0].message.function == "request_header_ancestors"
+        assert msgs[0].message.data.header_hash == blocks[9].header_hash
+
+        # Receiving a header again keeps the same cached block
+        cached_block = wallet_node.cached_blocks[blocks[10].header_hash]
+        record = cached_block.record
+        await respond_header_messages(10)
+        assert wallet_node.cached_blocks[blocks[10].header_hash] is cached_block
+        assert cached_block.record is record
+
+        # The previous block is already cached, so it continues with this one, without any requests
+        assert await respond_header_messages(11) == []
+        assert cached_block.next_header_hash == blocks[11].header_hash
+
+        # The ancestors are added without requesting any headers again, followed by the cached blocks
+        assert len(await deliver(msgs)) == 1
+        await time_out_assert(60, wallet_height_at_least, True, wallet_node, 9)
+        assert blocks[11].header_hash in wallet_node.wallet_state_manager.block_records
+
     @pytest.mark.asyncio
     async def test_short_sync_with_transactions_wallet(self, wallet_node):
         BURN_PUZZLE_HASH_1 = b"0" * 32